@@ -0,0 +1,218 @@
+"""Shared loaders for the resume datasets used across lectures."""
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+import csv
+import mmap
+import os
+import re
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # optional: without it, load_resumes uses the csv module
+    pa = None
+    pa_csv = None
+
+__all__ = [
+    "MappedColumn",
+    "ResumeRow",
+    "ResumeStore",
+    "iter_resumes",
+    "load_resumes",
+]
+
+
+class ResumeRow(NamedTuple):
+    """A single resume; fields are readable as row.Resume_str or row['Resume_str']."""
+    ID: str
+    Resume_str: str
+    Resume_html: str
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key in self._fields:
+                return getattr(self, key)
+            raise KeyError(key)
+        return tuple.__getitem__(self, key)
+
+
+# One CSV field: a quoted string with "" escapes, or a run of unquoted bytes
+_CSV_FIELD = re.compile(rb'"[^"]*(?:""[^"]*)*"|[^,\r\n]*')
+
+
+def _scan_csv(buf: mmap.mmap) -> Iterator[List[Tuple[int, int]]]:
+    """Yield each CSV record as a list of (start, end) byte spans, one per field."""
+    pos, size = 0, len(buf)
+    row: List[Tuple[int, int]] = []
+    while pos < size:
+        match = _CSV_FIELD.match(buf, pos)
+        assert match is not None  # the unquoted branch also matches empty
+        end = match.end()
+        row.append((pos, end))
+        if end < size and buf[end] == ord(","):
+            pos = end + 1
+            continue
+        if row != [(pos, pos)]:  # skip blank lines
+            yield row
+        row = []
+        pos = end + (2 if buf[end:end + 2] == b"\r\n" else 1)
+
+
+def _decode_field(raw: bytes) -> str:
+    """Decode a raw CSV field, removing its quotes and "" escapes if quoted."""
+    text = raw.decode("utf-8")
+    if text.startswith('"'):
+        text = text[1:-1].replace('""', '"')
+    return text
+
+
+class MappedColumn(Sequence):
+    """
+    A column of CSV fields read from a memory-mapped file on access.
+
+    Only byte offsets are kept in memory; each field is decoded when indexed,
+    so many concurrent tasks can share one read-only buffer and hold just the
+    text they are currently working on.
+    """
+
+    def __init__(self, buf: mmap.mmap, spans: List[Tuple[int, int]]):
+        self.buf = buf
+        self.spans = spans
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        start, end = self.spans[i]
+        return _decode_field(self.buf[start:end])
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+@dataclass(repr=False)
+class ResumeStore(Mapping):
+    """
+    Resumes stored column-wise: parallel lists plus an ID -> position index.
+
+    Behaves like a read-only dict of ID -> ResumeRow, so resumes[rid]['Resume_str']
+    and resumes.values() keep working, while bulk passes can walk
+    store.resume_str directly without touching a per-resume object.
+
+    With load_resumes(..., lazy=True) the text columns are MappedColumns, which
+    decode each resume from the memory-mapped CSV only when it is accessed.
+    """
+    ids: List[str]
+    resume_str: Sequence[str]
+    resume_html: Sequence[str]
+    index: Dict[str, int]
+
+    @classmethod
+    def from_columns(
+        cls,
+        ids: List[str],
+        resume_str: Sequence[str],
+        resume_html: Sequence[str]
+    ) -> "ResumeStore":
+        """Build a store from parallel columns; later rows win on duplicate IDs."""
+        index = {rid: i for i, rid in enumerate(ids)}
+        return cls(ids, resume_str, resume_html, index)
+
+    def __getitem__(self, rid: str) -> ResumeRow:
+        i = self.index[rid]
+        return ResumeRow(self.ids[i], self.resume_str[i], self.resume_html[i])
+
+    def __contains__(self, rid: object) -> bool:
+        return rid in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return f"ResumeStore({len(self)} resumes)"
+
+
+def iter_resumes(csv_path: str) -> Iterator[ResumeRow]:
+    """
+    Stream resumes from CSV one row at a time.
+
+    Args:
+        csv_path: Path to the resumes CSV file
+
+    Yields:
+        ResumeRow for each resume in file order
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        # Resolve column positions once instead of building a dict per row
+        i_id, i_str, i_html = (header.index(name) for name in ResumeRow._fields)
+        for row in reader:
+            if not row:  # csv.reader yields [] for blank lines
+                continue
+            yield ResumeRow(row[i_id], row[i_str], row[i_html])
+
+
+def load_resumes(csv_path: str, lazy: bool = False) -> ResumeStore:
+    """
+    Load all resumes from CSV into a ResumeStore.
+
+    Args:
+        csv_path: Path to the resumes CSV file
+        lazy: Memory-map the file and decode resume text only when accessed,
+            instead of reading every resume into memory up front
+
+    Returns:
+        ResumeStore mapping resume ID to resume data (ID, Resume_str, Resume_html)
+    """
+    if lazy:
+        return _load_resumes_mapped(csv_path)
+
+    if pa_csv is None:
+        ids, resume_str, resume_html = [], [], []
+        for row in iter_resumes(csv_path):
+            ids.append(row.ID)
+            resume_str.append(row.Resume_str)
+            resume_html.append(row.Resume_html)
+        return ResumeStore.from_columns(ids, resume_str, resume_html)
+
+    # Parse with Arrow's vectorized reader; resume text contains quoted newlines
+    table = pa_csv.read_csv(
+        csv_path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in ResumeRow._fields},
+            include_columns=list(ResumeRow._fields),
+        ),
+    )
+    return ResumeStore.from_columns(
+        *(table.column(name).to_pylist() for name in ResumeRow._fields)
+    )
+
+
+def _load_resumes_mapped(csv_path: str) -> ResumeStore:
+    """Build a ResumeStore whose text columns are views into the mapped CSV."""
+    if os.path.getsize(csv_path) == 0:
+        return ResumeStore.from_columns([], [], [])
+    with open(csv_path, 'rb') as f:
+        # The mapping stays valid after the file is closed
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    rows = _scan_csv(buf)
+    header = [_decode_field(buf[start:end]) for start, end in next(rows)]
+    i_id, i_str, i_html = (header.index(name) for name in ResumeRow._fields)
+    ids, str_spans, html_spans = [], [], []
+    for row in rows:
+        start, end = row[i_id]
+        ids.append(_decode_field(buf[start:end]))
+        str_spans.append(row[i_str])
+        html_spans.append(row[i_html])
+    return ResumeStore.from_columns(
+        ids, MappedColumn(buf, str_spans), MappedColumn(buf, html_spans)
+    )
@@ -0,0 +1,31 @@
+"""Shared text helpers for building LLM prompts."""
+
+__all__ = ["smart_truncate"]
+
+
+def smart_truncate(text: str, limit: int) -> str:
+    """
+    Truncate text to at most `limit` characters, ending on a natural boundary.
+
+    Cuts just before the last line break or just after the last sentence end
+    inside the limit, else at the last space, so the model never sees a half-word. Boundaries in the first half
+    of the window are ignored (to avoid dropping too much text), in which case
+    the text is cut at exactly `limit`.
+
+    Args:
+        text: Text to truncate
+        limit: Maximum number of characters to keep
+
+    Returns:
+        text unchanged if it fits, otherwise a prefix of at most `limit` characters
+    """
+    if len(text) <= limit:
+        return text
+    floor = limit // 2
+    # rfind runs in C, so scanning backwards from the limit is cheap
+    cut = max(text.rfind("\n", floor, limit), text.rfind(". ", floor, limit) + 1)
+    if cut < floor:
+        cut = text.rfind(" ", floor, limit)
+    if cut < floor:
+        cut = limit
+    return text[:cut]
@@ -1,31 +1,231 @@
 """Utility functions for resume screening with LLMs."""
 
-from typing import Any, Dict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Sequence, Tuple,
+)
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+import asyncio
+import atexit
+import hashlib
 import httpx
-import json
-import csv
+import orjson
+import sys
 
+try:
+    import diskcache
+except ImportError:  # optional: without it, responses are only cached in memory
+    diskcache = None
 
-def load_resumes(csv_path: str) -> Dict[str, Dict[str, str]]:
-    """
-    Load all resumes from CSV into a dictionary.
+# Resume loaders are shared across lectures from <repo>/common
+_REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
-    Args:
-        csv_path: Path to the resumes CSV file
+from common.io_utils import (  # noqa: E402
+    ResumeRow,
+    ResumeStore,
+    iter_resumes,
+    load_resumes,
+)
+from common.text_utils import smart_truncate  # noqa: E402
 
-    Returns:
-        Dict mapping resume ID to resume data (ID, Resume_str, Resume_html)
+__all__ = [
+    "ResumeRow",
+    "ResumeStore",
+    "iter_resumes",
+    "load_resumes",
+    "get_client",
+    "analyze_resume",
+    "analyze_resume_async",
+    "run_batch",
+    "analyze_resumes_batch",
+    "analyze_resumes_batch_async",
+]
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Resumes are cut to at most this many characters (on a word boundary)
+MAX_RESUME_CHARS = 3000
+
+# Shared sync client so back-to-back calls reuse one keep-alive connection
+_CLIENT = httpx.Client(
+    timeout=httpx.Timeout(60.0, connect=10.0),
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+)
+atexit.register(_CLIENT.close)
+
+# Shared async client, created lazily by get_client()
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Response cache: in-process LRU backed by an on-disk cache that survives reruns
+LLM_CACHE_DIR = ".llm_cache"
+_MEMORY_CACHE_SIZE = 1024
+_memory_cache: "OrderedDict[str, str]" = OrderedDict()
+_disk_cache: Optional[Any] = None
+
+
+def get_client() -> httpx.AsyncClient:
     """
-    resumes = {}
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            resumes[row['ID']] = {
-                'ID': row['ID'],
-                'Resume_str': row['Resume_str'],
-                'Resume_html': row['Resume_html']
-            }
-    return resumes
+    Return the shared AsyncClient for the running event loop.
+
+    The client is created on first use so that concurrent requests share one
+    connection pool. Pooled connections are bound to the loop that opened them,
+    so a fresh client is created whenever the event loop changes (e.g. between
+    two asyncio.run calls).
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if (
+        _async_client is None
+        or _async_client.is_closed
+        or _async_client_loop is not loop
+    ):
+        # HTTP/2 multiplexes concurrent requests over a few shared connections
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+def _cache_key(body: bytes) -> str:
+    """Hash an encoded request body (model, temperature, prompt, ...) into a key."""
+    return hashlib.sha256(body).hexdigest()
+
+
+def _get_disk_cache() -> Optional[Any]:
+    """Open the on-disk cache on first use, or return None without diskcache."""
+    global _disk_cache
+    if _disk_cache is None and diskcache is not None:
+        _disk_cache = diskcache.Cache(LLM_CACHE_DIR)
+    return _disk_cache
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Return the cached response content for key, or None on a miss."""
+    content = _memory_cache.get(key)
+    if content is not None:
+        _memory_cache.move_to_end(key)
+        return content
+    disk = _get_disk_cache()
+    if disk is not None:
+        content = disk.get(key)
+        if content is not None:
+            _remember(key, content)
+    return content
+
+
+def _cache_set(key: str, content: str) -> None:
+    """Store response content in both the memory and disk caches."""
+    _remember(key, content)
+    disk = _get_disk_cache()
+    if disk is not None:
+        disk[key] = content
+
+
+def _remember(key: str, content: str) -> None:
+    """Insert into the in-memory LRU, evicting the oldest entry when full."""
+    _memory_cache[key] = content
+    _memory_cache.move_to_end(key)
+    if len(_memory_cache) > _MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+def _build_request(
+    api_key: str,
+    prompt: str,
+    resume_text: str,
+    output_schema: str,
+    model: str,
+    temperature: float
+) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """Build the headers and payload for an analyze_resume request."""
+    # Build the full prompt. The f-string is joined in a single allocation, and
+    # truncation only copies when the resume is actually longer than the limit.
+    full_prompt = f"""{prompt}
+
+Resume:
+{smart_truncate(resume_text, MAX_RESUME_CHARS)}
+
+Return a JSON object with this structure:
+{output_schema}
+
+Return ONLY valid JSON, no additional text."""
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": full_prompt}],
+        "temperature": temperature,
+        "max_tokens": 1500,
+        "response_format": {"type": "json_object"}
+    }
+    return headers, payload
+
+
+def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the parsed JSON result and usage from an OpenRouter response."""
+    content = data["choices"][0]["message"]["content"]
+    result = orjson.loads(content)
+
+    return {
+        "result": result,
+        "error": None,
+        "usage": data.get("usage", {})
+    }
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry rate limits, server errors, network failures and malformed JSON."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TransportError, orjson.JSONDecodeError))
+
+
+# Exponential backoff with jitter; after the last attempt the error is re-raised
+_retry = retry(
+    wait=wait_random_exponential(min=1, max=20),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
+
+
+@_retry
+def _post_chat(headers: Dict[str, str], body: bytes) -> Tuple[Dict[str, Any], str]:
+    """POST a chat request and parse it; returns (result dict, raw JSON content)."""
+    resp = _CLIENT.post(OPENROUTER_URL, headers=headers, content=body)
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    return _parse_response(data), data["choices"][0]["message"]["content"]
+
+
+@_retry
+async def _post_chat_async(
+    headers: Dict[str, str],
+    body: bytes
+) -> Tuple[Dict[str, Any], str]:
+    """Async version of _post_chat using the shared AsyncClient."""
+    resp = await get_client().post(OPENROUTER_URL, headers=headers, content=body)
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    return _parse_response(data), data["choices"][0]["message"]["content"]
 
 
 def analyze_resume(
@@ -34,7 +234,8 @@ def analyze_resume(
     resume_text: str,
     output_schema: str,
     model: str = "anthropic/claude-3.5-sonnet",
-    temperature: float = 0.3
+    temperature: float = 0.3,
+    bypass_cache: bool = False
 ) -> Dict[str, Any]:
     """
     Analyze a resume using an LLM with structured output.
@@ -46,52 +247,184 @@ def analyze_resume(
         output_schema: JSON schema description for the output format
         model: Model to use (default: Claude 3.5 Sonnet)
         temperature: Sampling temperature (default: 0.3 for consistency)
+        bypass_cache: Skip the cache lookup (the fresh response is still cached)
 
     Returns:
         Dict with 'result' (parsed JSON), 'error' (if any), and 'usage' (token counts)
     """
-    # Build the full prompt
-    full_prompt = f"""{prompt}
+    headers, payload = _build_request(
+        api_key, prompt, resume_text, output_schema, model, temperature
+    )
 
-Resume:
-{resume_text[:3000]}
+    body = orjson.dumps(payload)
+    key = _cache_key(body)
+    if not bypass_cache:
+        cached = _cache_get(key)
+        if cached is not None:
+            return {"result": orjson.loads(cached), "error": None, "usage": {}}
 
-Return a JSON object with this structure:
-{output_schema}
+    try:
+        response, content = _post_chat(headers, body)
+        _cache_set(key, content)
+        return response
+    except Exception as e:
+        return {
+            "result": None,
+            "error": str(e),
+            "usage": {}
+        }
 
-Return ONLY valid JSON, no additional text."""
 
-    # Make API call
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": full_prompt}],
-        "temperature": temperature,
-        "max_tokens": 1500,
-        "response_format": {"type": "json_object"}
-    }
+async def analyze_resume_async(
+    api_key: str,
+    prompt: str,
+    resume_text: str,
+    output_schema: str,
+    model: str = "anthropic/claude-3.5-sonnet",
+    temperature: float = 0.3,
+    bypass_cache: bool = False
+) -> Dict[str, Any]:
+    """
+    Async version of analyze_resume using the shared AsyncClient.
+
+    Args:
+        api_key: OpenRouter API key
+        prompt: The instruction for what to analyze
+        resume_text: The resume text to analyze
+        output_schema: JSON schema description for the output format
+        model: Model to use (default: Claude 3.5 Sonnet)
+        temperature: Sampling temperature (default: 0.3 for consistency)
+        bypass_cache: Skip the cache lookup (the fresh response is still cached)
+
+    Returns:
+        Dict with 'result' (parsed JSON), 'error' (if any), and 'usage' (token counts)
+    """
+    headers, payload = _build_request(
+        api_key, prompt, resume_text, output_schema, model, temperature
+    )
+
+    body = orjson.dumps(payload)
+    key = _cache_key(body)
+    if not bypass_cache:
+        cached = _cache_get(key)
+        if cached is not None:
+            return {"result": orjson.loads(cached), "error": None, "usage": {}}
 
     try:
-        with httpx.Client(timeout=60) as client:
-            resp = client.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-
-            content = data["choices"][0]["message"]["content"]
-            result = json.loads(content)
-
-            return {
-                "result": result,
-                "error": None,
-                "usage": data.get("usage", {})
-            }
+        response, content = await _post_chat_async(headers, body)
+        _cache_set(key, content)
+        return response
     except Exception as e:
         return {
             "result": None,
             "error": str(e),
             "usage": {}
         }
+
+
+async def run_batch(
+    items: Sequence[Any],
+    fn: Callable[[Any], Awaitable[Any]],
+    concurrency: int = 16
+) -> List[Any]:
+    """
+    Run an async function over items with at most `concurrency` in flight.
+
+    Args:
+        items: Inputs to process
+        fn: Async function called once per item
+        concurrency: Maximum number of concurrent calls
+
+    Returns:
+        List of results, in the same order as items
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(item: Any) -> Any:
+        async with sem:
+            return await fn(item)
+
+    return await asyncio.gather(*[_one(item) for item in items])
+
+
+async def analyze_resumes_batch_async(
+    api_key: str,
+    prompt: str,
+    resumes: Sequence[str],
+    output_schema: str,
+    model: str = "anthropic/claude-3.5-sonnet",
+    temperature: float = 0.3,
+    concurrency: int = 16,
+    bypass_cache: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Analyze many resumes concurrently.
+
+    Use this directly from a notebook cell with `await`.
+
+    Args:
+        api_key: OpenRouter API key
+        prompt: The instruction for what to analyze
+        resumes: Resume texts to analyze, e.g. store.resume_str from
+            load_resumes(path, lazy=True); each text is only read once its
+            request is about to be sent
+        output_schema: JSON schema description for the output format
+        model: Model to use (default: Claude 3.5 Sonnet)
+        temperature: Sampling temperature (default: 0.3 for consistency)
+        concurrency: Maximum number of requests in flight
+        bypass_cache: Skip the cache lookup (fresh responses are still cached)
+
+    Returns:
+        List of analyze_resume results, in the same order as resumes
+    """
+    async def _analyze(i: int) -> Dict[str, Any]:
+        # Index inside the semaphore so pending tasks hold an int, not the text
+        return await analyze_resume_async(
+            api_key, prompt, resumes[i], output_schema, model, temperature,
+            bypass_cache
+        )
+
+    return await run_batch(range(len(resumes)), _analyze, concurrency)
+
+
+def analyze_resumes_batch(
+    api_key: str,
+    prompt: str,
+    resumes: Sequence[str],
+    output_schema: str,
+    model: str = "anthropic/claude-3.5-sonnet",
+    temperature: float = 0.3,
+    concurrency: int = 16,
+    bypass_cache: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Synchronous wrapper around analyze_resumes_batch_async.
+
+    Args:
+        api_key: OpenRouter API key
+        prompt: The instruction for what to analyze
+        resumes: Resume texts to analyze
+        output_schema: JSON schema description for the output format
+        model: Model to use (default: Claude 3.5 Sonnet)
+        temperature: Sampling temperature (default: 0.3 for consistency)
+        concurrency: Maximum number of requests in flight
+        bypass_cache: Skip the cache lookup (fresh responses are still cached)
+
+    Returns:
+        List of analyze_resume results, in the same order as resumes
+    """
+    return _run_sync(analyze_resumes_batch_async(
+        api_key, prompt, resumes, output_schema, model, temperature, concurrency,
+        bypass_cache
+    ))
+
+
+def _run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine to completion, even if an event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Jupyter already runs a loop in this thread, so run ours in a worker thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
@@ -1,31 +1,31 @@
 """Utility functions for resume screening with LLMs."""
 
+from pathlib import Path
 from typing import Any, Dict
 import httpx
 import json
-import csv
-
-
-def load_resumes(csv_path: str) -> Dict[str, Dict[str, str]]:
-    """
-    Load all resumes from CSV into a dictionary.
-
-    Args:
-        csv_path: Path to the resumes CSV file
-
-    Returns:
-        Dict mapping resume ID to resume data (ID, Resume_str, Resume_html)
-    """
-    resumes = {}
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            resumes[row['ID']] = {
-                'ID': row['ID'],
-                'Resume_str': row['Resume_str'],
-                'Resume_html': row['Resume_html']
-            }
-    return resumes
+import sys
+
+# Resume loaders are shared across lectures from <repo>/common
+_REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from common.io_utils import (  # noqa: E402
+    ResumeRow,
+    ResumeStore,
+    iter_resumes,
+    load_resumes,
+)
+
+__all__ = [
+    "ResumeRow",
+    "ResumeStore",
+    "iter_resumes",
+    "load_resumes",
+    "load_job_requirements",
+    "structured_llm_call",
+]
 
 
 def load_job_requirements(file_path: str) -> str:
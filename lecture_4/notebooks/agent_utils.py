@@ -1,37 +1,307 @@
 """Utility functions for building a simple application routing agent."""
 
-from typing import Any, Dict, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import (
+    Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Sequence, Tuple,
+)
+from tenacity import (
+    AsyncRetrying,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+import asyncio
+import atexit
+import hashlib
 import httpx
+import importlib.util
 import json
-import csv
+import orjson
+import sys
+
+try:
+    import diskcache
+except ImportError:  # optional: without it, responses are only cached in memory
+    diskcache = None
+
+# Resume loaders are shared across lectures from <repo>/common. A mypyc build of
+# this module has no __file__ while it initializes, so ask the import system.
+_MODULE_FILE = globals().get("__file__")
+if not _MODULE_FILE:
+    _spec = importlib.util.find_spec(__name__)
+    assert _spec is not None and _spec.origin
+    _MODULE_FILE = _spec.origin
+_REPO_ROOT = str(Path(_MODULE_FILE).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from common.io_utils import (  # noqa: E402
+    ResumeRow,
+    ResumeStore,
+    iter_resumes,
+    load_resumes,
+)
+from common.text_utils import smart_truncate  # noqa: E402
+
+__all__ = [
+    "ResumeRow",
+    "ResumeStore",
+    "iter_resumes",
+    "load_resumes",
+    "load_job_requirements",
+    "get_client",
+    "structured_llm_call",
+    "structured_llm_call_async",
+    "run_batch",
+    "structured_llm_call_batch",
+    "structured_llm_call_batch_async",
+    "schedule_technical_assessment",
+    "route_to_department",
+    "request_additional_info",
+    "reject_application",
+    "flag_for_manual_review",
+    "send_email",
+    "done",
+    "TOOL_REGISTRY",
+    "call_tool",
+    "build_tool_spec",
+    "TOOL_SPEC_PROMPT",
+]
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Context values are cut to at most this many characters (on a word boundary)
+MAX_CONTEXT_CHARS = 5000
+
+# Shared sync client so back-to-back calls reuse one keep-alive connection
+_CLIENT = httpx.Client(
+    timeout=httpx.Timeout(60.0, connect=10.0),
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+)
+atexit.register(_CLIENT.close)
+
+# Shared async client, created lazily by get_client()
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Response cache: in-process LRU backed by an on-disk cache that survives reruns
+LLM_CACHE_DIR = ".llm_cache"
+_MEMORY_CACHE_SIZE = 1024
+_memory_cache: "OrderedDict[str, str]" = OrderedDict()
+_disk_cache: Optional[Any] = None
 
 
-def load_resumes(csv_path: str) -> Dict[str, Dict[str, str]]:
+def load_job_requirements(file_path: str) -> str:
+    """Load job requirements from a markdown file."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient for the running event loop.
+
+    The client is created on first use so that concurrent requests share one
+    connection pool. Pooled connections are bound to the loop that opened them,
+    so a fresh client is created whenever the event loop changes (e.g. between
+    two asyncio.run calls).
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if (
+        _async_client is None
+        or _async_client.is_closed
+        or _async_client_loop is not loop
+    ):
+        # HTTP/2 multiplexes concurrent requests over a few shared connections
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+def _cache_key(body: bytes) -> str:
+    """Hash an encoded request body (model, temperature, prompt, ...) into a key."""
+    return hashlib.sha256(body).hexdigest()
+
+
+def _get_disk_cache() -> Optional[Any]:
+    """Open the on-disk cache on first use, or return None without diskcache."""
+    global _disk_cache
+    if _disk_cache is None and diskcache is not None:
+        _disk_cache = diskcache.Cache(LLM_CACHE_DIR)
+    return _disk_cache
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Return the cached response content for key, or None on a miss."""
+    content = _memory_cache.get(key)
+    if content is not None:
+        _memory_cache.move_to_end(key)
+        return content
+    disk = _get_disk_cache()
+    if disk is not None:
+        content = disk.get(key)
+        if content is not None:
+            _remember(key, content)
+    return content
+
+
+def _cache_set(key: str, content: str) -> None:
+    """Store response content in both the memory and disk caches."""
+    _remember(key, content)
+    disk = _get_disk_cache()
+    if disk is not None:
+        disk[key] = content
+
+
+def _remember(key: str, content: str) -> None:
+    """Insert into the in-memory LRU, evicting the oldest entry when full."""
+    _memory_cache[key] = content
+    _memory_cache.move_to_end(key)
+    if len(_memory_cache) > _MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+@lru_cache(maxsize=64)
+def _prompt_template(
+    prompt: str,
+    context_keys: Tuple[str, ...],
+    schema_json: bytes
+) -> Tuple[Tuple[str, ...], Tuple[int, ...]]:
     """
-    Load all resumes from CSV into a dictionary.
+    Precompute the fixed parts of a structured prompt.
+
+    The template is built once per (prompt, context keys, schema) and reused
+    for every call in a batch, so each call only fills in its context values.
 
     Args:
-        csv_path: Path to the resumes CSV file
+        prompt: The instruction/task description
+        context_keys: Context field names, in prompt order
+        schema_json: Compact orjson encoding of the output schema
 
     Returns:
-        Dict mapping resume ID to resume data (ID, Resume_str, Resume_html)
+        Tuple of (parts, slots): the prompt pieces, and the index of each
+        (empty) context value placeholder in parts. The piece after each
+        placeholder holds the truncation marker and is also empty by default.
     """
-    resumes = {}
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            resumes[row['ID']] = {
-                'ID': row['ID'],
-                'Resume_str': row['Resume_str'],
-                'Resume_html': row['Resume_html']
-            }
-    return resumes
+    schema_str = orjson.dumps(
+        orjson.loads(schema_json), option=orjson.OPT_INDENT_2
+    ).decode()
+
+    parts: List[str] = []
+    slots = []
+    text = f"{prompt}\n\n"
+    for key in context_keys:
+        parts.append(f"{text}\n{key.upper()}:\n")
+        slots.append(len(parts))
+        parts.extend(["", ""])
+        text = "\n"
+    parts.append(
+        f"{text}\n\nReturn a JSON object with this exact structure:\n{schema_str}"
+        "\n\nIMPORTANT: Return ONLY valid JSON, no additional text or markdown "
+        "formatting."
+    )
+    return tuple(parts), tuple(slots)
+
+
+def _build_request(
+    api_key: str,
+    prompt: str,
+    context_data: Dict[str, Any],
+    output_schema: Dict[str, Any],
+    model: str,
+    temperature: float
+) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """Build the headers and payload for a structured_llm_call request."""
+    # Like json.dumps, turn non-str schema keys (e.g. ints) into strings
+    schema_json = orjson.dumps(output_schema, option=orjson.OPT_NON_STR_KEYS)
+    template, slots = _prompt_template(prompt, tuple(context_data), schema_json)
+    parts = list(template)
+    for slot, value in zip(slots, context_data.values(), strict=True):
+        if isinstance(value, str) and len(value) > MAX_CONTEXT_CHARS:
+            parts[slot] = smart_truncate(value, MAX_CONTEXT_CHARS)
+            parts[slot + 1] = "\n... (truncated)"
+        else:
+            parts[slot] = format(value)
+    full_prompt = "".join(parts)
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": full_prompt}],
+        "temperature": temperature,
+        "max_tokens": 2000,
+        "response_format": {"type": "json_object"}
+    }
+    return headers, payload
 
 
-def load_job_requirements(file_path: str) -> str:
-    """Load job requirements from a markdown file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return f.read()
+def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the parsed JSON result and usage from an OpenRouter response."""
+    content = data["choices"][0]["message"]["content"]
+    result = orjson.loads(content)
+
+    return {
+        "result": result,
+        "error": None,
+        "usage": data.get("usage", {})
+    }
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry rate limits, server errors, network failures and malformed JSON."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TransportError, orjson.JSONDecodeError))
+
+
+# Exponential backoff with jitter; after the last attempt the error is re-raised
+_RETRY_POLICY: Dict[str, Any] = dict(
+    wait=wait_random_exponential(min=1, max=20),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
+
+
+@retry(**_RETRY_POLICY)
+def _post_chat(headers: Dict[str, str], body: bytes) -> Tuple[Dict[str, Any], str]:
+    """POST a chat request and parse it; returns (result dict, raw JSON content)."""
+    resp = _CLIENT.post(OPENROUTER_URL, headers=headers, content=body)
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    return _parse_response(data), data["choices"][0]["message"]["content"]
+
+
+async def _post_chat_async(
+    headers: Dict[str, str],
+    body: bytes
+) -> Tuple[Dict[str, Any], str]:
+    """Async version of _post_chat using the shared AsyncClient."""
+    # Iterate AsyncRetrying instead of decorating: @retry picks sync or async
+    # retrying by inspecting the function, which fails for mypyc-compiled coroutines
+    async for attempt in AsyncRetrying(**_RETRY_POLICY):
+        with attempt:
+            resp = await get_client().post(
+                OPENROUTER_URL, headers=headers, content=body
+            )
+            resp.raise_for_status()
+            data = orjson.loads(resp.content)
+            result = _parse_response(data), data["choices"][0]["message"]["content"]
+    return result
 
 
 def structured_llm_call(
@@ -40,7 +310,8 @@ def structured_llm_call(
     context_data: Dict[str, Any],
     output_schema: Dict[str, Any],
     model: str = "anthropic/claude-3.5-sonnet",
-    temperature: float = 0.2
+    temperature: float = 0.2,
+    bypass_cache: bool = False
 ) -> Dict[str, Any]:
     """
     Generic function for making structured LLM calls with OpenRouter.
@@ -52,58 +323,73 @@ def structured_llm_call(
         output_schema: Dictionary describing the expected JSON structure
         model: Model to use
         temperature: Sampling temperature
+        bypass_cache: Skip the cache lookup (the fresh response is still cached)
 
     Returns:
         Dict with 'result', 'error', and 'usage'
     """
-    # Build context section
-    context_str = ""
-    for key, value in context_data.items():
-        if isinstance(value, str) and len(value) > 5000:
-            value = value[:5000] + "\n... (truncated)"
-        context_str += f"\n{key.upper()}:\n{value}\n"
+    headers, payload = _build_request(
+        api_key, prompt, context_data, output_schema, model, temperature
+    )
 
-    # Build schema description
-    schema_str = json.dumps(output_schema, indent=2)
+    body = orjson.dumps(payload)
+    key = _cache_key(body)
+    if not bypass_cache:
+        cached = _cache_get(key)
+        if cached is not None:
+            return {"result": orjson.loads(cached), "error": None, "usage": {}}
 
-    # Construct full prompt
-    full_prompt = f"""{prompt}
-
-{context_str}
+    try:
+        response, content = _post_chat(headers, body)
+        _cache_set(key, content)
+        return response
+    except Exception as e:
+        return {
+            "result": None,
+            "error": str(e),
+            "usage": {}
+        }
 
-Return a JSON object with this exact structure:
-{schema_str}
 
-IMPORTANT: Return ONLY valid JSON, no additional text or markdown formatting."""
+async def structured_llm_call_async(
+    api_key: str,
+    prompt: str,
+    context_data: Dict[str, Any],
+    output_schema: Dict[str, Any],
+    model: str = "anthropic/claude-3.5-sonnet",
+    temperature: float = 0.2,
+    bypass_cache: bool = False
+) -> Dict[str, Any]:
+    """
+    Async version of structured_llm_call using the shared AsyncClient.
 
-    # Make API call
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": full_prompt}],
-        "temperature": temperature,
-        "max_tokens": 2000,
-        "response_format": {"type": "json_object"}
-    }
+    Args:
+        api_key: OpenRouter API key
+        prompt: The instruction/task description
+        context_data: Dictionary of context (e.g., {'resume': '...', 'job_req': '...'})
+        output_schema: Dictionary describing the expected JSON structure
+        model: Model to use
+        temperature: Sampling temperature
+        bypass_cache: Skip the cache lookup (the fresh response is still cached)
 
-    try:
-        with httpx.Client(timeout=60) as client:
-            resp = client.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+    Returns:
+        Dict with 'result', 'error', and 'usage'
+    """
+    headers, payload = _build_request(
+        api_key, prompt, context_data, output_schema, model, temperature
+    )
 
-            content = data["choices"][0]["message"]["content"]
-            result = json.loads(content)
+    body = orjson.dumps(payload)
+    key = _cache_key(body)
+    if not bypass_cache:
+        cached = _cache_get(key)
+        if cached is not None:
+            return {"result": orjson.loads(cached), "error": None, "usage": {}}
 
-            return {
-                "result": result,
-                "error": None,
-                "usage": data.get("usage", {})
-            }
+    try:
+        response, content = await _post_chat_async(headers, body)
+        _cache_set(key, content)
+        return response
     except Exception as e:
         return {
             "result": None,
@@ -112,10 +398,121 @@ IMPORTANT: Return ONLY valid JSON, no additional text or markdown formatting."""
         }
 
 
+async def run_batch(
+    items: Sequence[Any],
+    fn: Callable[[Any], Awaitable[Any]],
+    concurrency: int = 16
+) -> List[Any]:
+    """
+    Run an async function over items with at most `concurrency` in flight.
+
+    Args:
+        items: Inputs to process
+        fn: Async function called once per item
+        concurrency: Maximum number of concurrent calls
+
+    Returns:
+        List of results, in the same order as items
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(item: Any) -> Any:
+        async with sem:
+            return await fn(item)
+
+    return await asyncio.gather(*[_one(item) for item in items])
+
+
+async def structured_llm_call_batch_async(
+    api_key: str,
+    prompt: str,
+    contexts: Sequence[Dict[str, Any]],
+    output_schema: Dict[str, Any],
+    model: str = "anthropic/claude-3.5-sonnet",
+    temperature: float = 0.2,
+    concurrency: int = 16,
+    bypass_cache: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Run the same structured call over many contexts concurrently.
+
+    Use this directly from a notebook cell with `await`.
+
+    Args:
+        api_key: OpenRouter API key
+        prompt: The instruction/task description
+        contexts: One context_data dictionary per call
+        output_schema: Dictionary describing the expected JSON structure
+        model: Model to use
+        temperature: Sampling temperature
+        concurrency: Maximum number of requests in flight
+        bypass_cache: Skip the cache lookup (fresh responses are still cached)
+
+    Returns:
+        List of structured_llm_call results, in the same order as contexts
+    """
+    async def _call(context_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await structured_llm_call_async(
+            api_key, prompt, context_data, output_schema, model, temperature,
+            bypass_cache
+        )
+
+    return await run_batch(contexts, _call, concurrency)
+
+
+def structured_llm_call_batch(
+    api_key: str,
+    prompt: str,
+    contexts: Sequence[Dict[str, Any]],
+    output_schema: Dict[str, Any],
+    model: str = "anthropic/claude-3.5-sonnet",
+    temperature: float = 0.2,
+    concurrency: int = 16,
+    bypass_cache: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Synchronous wrapper around structured_llm_call_batch_async.
+
+    Args:
+        api_key: OpenRouter API key
+        prompt: The instruction/task description
+        contexts: One context_data dictionary per call
+        output_schema: Dictionary describing the expected JSON structure
+        model: Model to use
+        temperature: Sampling temperature
+        concurrency: Maximum number of requests in flight
+        bypass_cache: Skip the cache lookup (fresh responses are still cached)
+
+    Returns:
+        List of structured_llm_call results, in the same order as contexts
+    """
+    return _run_sync(structured_llm_call_batch_async(
+        api_key, prompt, contexts, output_schema, model, temperature, concurrency,
+        bypass_cache
+    ))
+
+
+def _run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine to completion, even if an event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Jupyter already runs a loop in this thread, so run ours in a worker thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
 # ============================================================================
 # TOOLS - Python functions that the agent can call
 # ============================================================================
 
+# Mock values returned by the tools (no real scheduling/email backend)
+MOCK_ASSESSMENT_DATE = "2024-02-15"
+MOCK_SENT_DATE = "2024-02-01"
+MOCK_REVIEWER = "hiring_manager"
+
+
 def schedule_technical_assessment(candidate_id: str, assessment_type: str) -> Dict[str, Any]:
     """
     Schedule a technical assessment for a candidate.
@@ -131,7 +528,7 @@ def schedule_technical_assessment(candidate_id: str, assessment_type: str) -> Di
         "status": "success",
         "message": f"Technical assessment ({assessment_type}) scheduled for candidate {candidate_id}",
         "assessment_type": assessment_type,
-        "scheduled_date": "2024-02-15"  # Mock date
+        "scheduled_date": MOCK_ASSESSMENT_DATE
     }
 
 
@@ -170,7 +567,7 @@ def request_additional_info(candidate_id: str, info_needed: str) -> Dict[str, An
         "status": "success",
         "message": f"Additional info requested from candidate {candidate_id}",
         "info_needed": info_needed,
-        "request_sent_date": "2024-02-01"  # Mock date
+        "request_sent_date": MOCK_SENT_DATE
     }
 
 
@@ -208,7 +605,7 @@ def flag_for_manual_review(candidate_id: str, concern: str) -> Dict[str, Any]:
         "status": "success",
         "message": f"Candidate {candidate_id} flagged for manual review",
         "concern": concern,
-        "assigned_to": "hiring_manager"  # Mock assignment
+        "assigned_to": MOCK_REVIEWER
     }
 
 
@@ -227,7 +624,7 @@ def send_email(candidate_id: str, template: str) -> Dict[str, Any]:
         "status": "success",
         "message": f"Email sent to candidate {candidate_id}",
         "template": template,
-        "sent_date": "2024-02-01"  # Mock date
+        "sent_date": MOCK_SENT_DATE
     }
 
 
@@ -252,7 +649,7 @@ def done(candidate_id: str) -> Dict[str, Any]:
 # TOOL REGISTRY - Describes available tools for the agent
 # ============================================================================
 
-TOOL_REGISTRY = {
+TOOL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "schedule_technical_assessment": {
         "function": schedule_technical_assessment,
         "description": "Schedule a technical assessment (coding challenge, system design, etc.) for a promising candidate",
@@ -310,3 +707,50 @@ TOOL_REGISTRY = {
         }
     }
 }
+
+
+@lru_cache(maxsize=None)
+def build_tool_spec(names: Tuple[str, ...]) -> str:
+    """
+    Describe the named tools for the agent prompt.
+
+    The registry doesn't change at runtime, so each tool subset is formatted once
+    and the same string is reused on every agent step.
+
+    Args:
+        names: Tool names (keys of TOOL_REGISTRY), in the order to list them
+
+    Returns:
+        One "- name: description" entry per tool, followed by its parameters
+    """
+    return "\n".join(
+        f"- {name}: {TOOL_REGISTRY[name]['description']}\n"
+        f"  Parameters: {json.dumps(TOOL_REGISTRY[name]['parameters'], indent=4)}"
+        for name in names
+    )
+
+
+# Tools section for the agent prompt, covering every registered tool
+TOOL_SPEC_PROMPT = build_tool_spec(tuple(TOOL_REGISTRY))
+
+# Tool name -> function, flattened once so dispatch is a single dict lookup
+_DISPATCH: Dict[str, Callable[..., Dict[str, Any]]] = {
+    name: spec["function"] for name, spec in TOOL_REGISTRY.items()
+}
+
+
+def call_tool(name: str, **args: Any) -> Dict[str, Any]:
+    """
+    Call a registered tool by name.
+
+    Args:
+        name: Tool name (a key of TOOL_REGISTRY)
+        **args: Parameters for the tool
+
+    Returns:
+        The tool's result dict
+
+    Raises:
+        KeyError: If no tool with that name is registered
+    """
+    return _DISPATCH[name](**args)